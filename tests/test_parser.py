@@ -3,8 +3,13 @@ Test OTF Parser against sample emails.
 Validates classification rules and metric extraction.
 """
 
-from otf_parser import parse_otf_email
+from otf_parser import (
+    CLASS_TYPES, parse_otf_email, parse_otf_email_file, parse_otf_emails_batch,
+    parse_otf_emails_to_columns
+)
 import json
+import os
+import tempfile
 
 
 def test_email(filepath: str, expected_class: str, test_name: str):
@@ -14,10 +19,15 @@ def test_email(filepath: str, expected_class: str, test_name: str):
     print(f"Expected: {expected_class}")
     print('='*60)
     
-    with open(filepath, 'r', encoding='utf-8') as f:
-        html = f.read()
+    # Streams the file into lxml rather than reading it into a string first
+    parsed = parse_otf_email_file(filepath, f'test-{test_name}')
     
-    parsed = parse_otf_email(html, f'test-{test_name}')
+    # The str path (fast scanners, result cache, template replay) must agree,
+    # as must raw bytes (what email's get_payload(decode=True) returns)
+    with open(filepath, 'rb') as f:
+        raw = f.read()
+    parsed_str = parse_otf_email(raw.decode('utf-8'), f'test-{test_name}')
+    parsed_bytes = parse_otf_email(raw, f'test-{test_name}')
     
     classification = parsed['classification']
     tread = parsed['tread']
@@ -34,14 +44,14 @@ def test_email(filepath: str, expected_class: str, test_name: str):
     
     print(f"\n🏃 TREAD METRICS")
     print(f"  Present: {tread['present']}")
-    if tread['total_time_minutes']:
-        print(f"  Time: {tread['total_time_minutes']:.2f} min")
+    if tread['total_time_seconds']:
+        print(f"  Time: {tread['total_time_seconds']/60:.2f} min ({tread['total_time_seconds']}s)")
         print(f"  Distance: {tread['distance_meters']}m ({tread['distance_meters']/1609.34:.2f} miles)")
     
     print(f"\n🚣 ROW METRICS")
     print(f"  Present: {row['present']}")
-    if row['total_time_minutes']:
-        print(f"  Time: {row['total_time_minutes']:.2f} min")
+    if row['total_time_seconds']:
+        print(f"  Time: {row['total_time_seconds']/60:.2f} min ({row['total_time_seconds']}s)")
         print(f"  Distance: {row['total_distance_meters']}m")
     
     print(f"\n💪 OVERALL METRICS")
@@ -52,8 +62,182 @@ def test_email(filepath: str, expected_class: str, test_name: str):
     print(json.dumps(classification['evidence'], indent=2))
     
     # Validation
-    success = classification['class_type'] == expected_class
-    print(f"\n{'✅ PASS' if success else '❌ FAIL'}: Classification matches expected")
+    class_ok = classification['class_type'] == expected_class
+    print(f"\n{'✅ PASS' if class_ok else '❌ FAIL'}: Classification matches expected")
+    
+    metric_keys = ('tread', 'row', 'total_calories', 'splat_points')
+    paths_ok = all(parsed_str[key] == parsed_bytes[key] == parsed[key] for key in metric_keys)
+    print(f"{'✅ PASS' if paths_ok else '❌ FAIL'}: String, bytes and file parsing extract the same metrics")
+    
+    return class_ok and paths_ok
+
+
+def test_variant(filepath: str, edits, expected: dict, test_name: str, check_file: bool = True):
+    """
+    Parse a sample with text edits applied and check selected result fields.
+    
+    The variant goes through parse_otf_email and, when check_file is set,
+    through parse_otf_email_file too; both must give the expected values.
+    """
+    print(f"\n{'='*60}")
+    print(f"Testing: {test_name}")
+    print('='*60)
+    
+    with open(filepath, 'r', encoding='utf-8') as f:
+        html = f.read()
+    for old, new in edits:
+        if old not in html:
+            print(f"\n❌ FAIL: {old!r} not found in {os.path.basename(filepath)}")
+            return False
+        html = html.replace(old, new, 1)
+    
+    parsed = {'str': parse_otf_email(html, f'test-{test_name}')}
+    if check_file:
+        with tempfile.NamedTemporaryFile('w', suffix='.html', encoding='utf-8', delete=False) as f:
+            f.write(html)
+        try:
+            parsed['file'] = parse_otf_email_file(f.name, f'test-{test_name}')
+        finally:
+            os.remove(f.name)
+    
+    success = True
+    for path, result in parsed.items():
+        for key, value in expected.items():
+            actual = result['classification']['class_type'] if key == 'class_type' else result[key]
+            ok = actual == value
+            success = success and ok
+            print(f"  [{path}] {key}: {actual}{'' if ok else f'  (expected {value})'}")
+    
+    print(f"\n{'✅ PASS' if success else '❌ FAIL'}: Variant metrics match expected")
+    
+    return success
+
+
+def test_empty_file():
+    """An empty or whitespace-only file parses like an empty string."""
+    print(f"\n{'='*60}")
+    print("Testing: Empty email files")
+    print('='*60)
+    
+    expected = parse_otf_email('', 'test-empty')
+    success = expected['classification']['class_type'] == 'STRENGTH_50'
+    for content in ('', '  \n\t '):
+        with tempfile.NamedTemporaryFile('w', suffix='.html', encoding='utf-8', delete=False) as f:
+            f.write(content)
+        try:
+            parsed = parse_otf_email_file(f.name, 'test-empty')
+        finally:
+            os.remove(f.name)
+        ok = all(parsed[key] == expected[key] for key in ('tread', 'row', 'total_calories', 'splat_points'))
+        ok = ok and parsed['classification']['class_type'] == 'STRENGTH_50'
+        print(f"  {content!r}: {parsed['classification']['class_type']}")
+        success = success and ok
+    
+    print(f"\n{'✅ PASS' if success else '❌ FAIL'}: Empty files give an empty STRENGTH_50 result")
+    
+    return success
+
+
+def test_cache_copy(filepath: str):
+    """Mutating a returned result must not leak into the next (cached) parse."""
+    print(f"\n{'='*60}")
+    print("Testing: Result cache copies")
+    print('='*60)
+    
+    with open(filepath, 'r', encoding='utf-8') as f:
+        html = f.read()
+    first = parse_otf_email(html, 'test-cache')
+    first['tread']['distance_meters'] = -1
+    first['classification']['evidence']['tread_time_sec'] = -1
+    second = parse_otf_email(html, 'test-cache')
+    
+    success = (
+        second['tread']['distance_meters'] == 5165
+        and second['classification']['evidence']['tread_time_sec'] == 1436
+    )
+    print(f"\n{'✅ PASS' if success else '❌ FAIL'}: Cached result is unaffected by caller mutation")
+    
+    return success
+
+
+def test_batch(cases, copies: int = 20):
+    """Parse sample emails as one batch and check results come back in order."""
+    print(f"\n{'='*60}")
+    print("Testing: Batch parsing")
+    print('='*60)
+    
+    items = []
+    expected = []
+    for filepath, expected_class, test_name in cases:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            html = f.read()
+        for i in range(copies):
+            items.append((html, f'test-{test_name}-{i}'))
+            expected.append(expected_class)
+    
+    # Large enough to go through the process pool
+    parsed = parse_otf_emails_batch(items, max_workers=2)
+    
+    success = (
+        len(parsed) == len(items)
+        and all(p['message_id'] == item[1] for p, item in zip(parsed, items))
+        and all(p['classification']['class_type'] == e for p, e in zip(parsed, expected))
+    )
+    print(f"  Emails parsed: {len(parsed)}/{len(items)}")
+    print(f"\n{'✅ PASS' if success else '❌ FAIL'}: Batch results match expected, in order")
+    
+    return success
+
+
+def test_columns(cases):
+    """Parse sample emails into columns and check them against per-email results."""
+    print(f"\n{'='*60}")
+    print("Testing: Columnar output")
+    print('='*60)
+    
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("\n⏭️  SKIP: numpy not installed")
+        return None
+    
+    items = []
+    for filepath, expected_class, test_name in cases:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            items.append((f.read(), f'test-{test_name}'))
+    
+    columns = parse_otf_emails_to_columns(items, max_workers=1)
+    
+    success = True
+    for i, (html, message_id) in enumerate(items):
+        parsed = parse_otf_email(html, message_id)
+        classification = parsed['classification']
+        row_ok = (
+            CLASS_TYPES[columns['class_code'][i]] == classification['class_type']
+            and columns['tread_seconds'][i] == classification['tread_seconds']
+            and columns['row_seconds'][i] == classification['row_seconds']
+            and columns['strength_seconds'][i] == classification['strength_seconds']
+            and columns['total_calories'][i] == parsed['total_calories']
+            and columns['splat_points'][i] == parsed['splat_points']
+        )
+        print(f"  {message_id}: {'ok' if row_ok else 'mismatch'}")
+        success = success and row_ok
+    
+    # Missing values, and values too large for int16, become -1
+    html = items[0][0]
+    sentinel_items = [
+        (html.replace('<p class="h1">1090</p>', '<p class="h1">40000</p>', 1), 'test-calories-out-of-range'),
+        (html.replace('<p class="h1">17</p>', '<p class="h1">--</p>', 1), 'test-splat-missing'),
+    ]
+    sentinel_columns = parse_otf_emails_to_columns(sentinel_items, max_workers=1)
+    sentinel_ok = (
+        sentinel_columns['total_calories'].tolist() == [-1, 1090]
+        and sentinel_columns['splat_points'].tolist() == [17, -1]
+    )
+    print(f"  -1 sentinels: {'ok' if sentinel_ok else 'mismatch'}")
+    success = success and sentinel_ok
+    
+    print(f"\n{'✅ PASS' if success else '❌ FAIL'}: Columns match per-email results")
     
     return success
 
@@ -65,38 +249,78 @@ def main():
     print("="*60)
     
     # Use relative paths from script location
-    import os
     script_dir = os.path.dirname(os.path.abspath(__file__))
     emails_dir = os.path.join(script_dir, 'emails')
     
-    results = []
+    cases = [
+        # Test 1: 90-minute class
+        (os.path.join(emails_dir, 'sample_90_min.html'), 'ORANGE_90', '90-min Orange class'),
+        # Test 2: 60-minute class
+        (os.path.join(emails_dir, 'sample_60_min.html'), 'ORANGE_60', '60-min Orange class'),
+        # Test 3: Tread 50
+        (os.path.join(emails_dir, 'sample_tread50.html'), 'TREAD_50', 'Tread 50 class'),
+    ]
     
-    # Test 1: 90-minute class
-    results.append(
-        test_email(
-            os.path.join(emails_dir, 'sample_90_min.html'),
-            'ORANGE_90',
-            '90-min Orange class'
-        )
-    )
+    results = [test_email(*case) for case in cases]
     
-    # Test 2: 60-minute class
-    results.append(
-        test_email(
-            os.path.join(emails_dir, 'sample_60_min.html'),
-            'ORANGE_60',
-            '60-min Orange class'
-        )
-    )
+    # Sample variants that the raw-HTML fast path can't handle, so they
+    # exercise the template/DOM fallbacks
+    sample_90 = cases[0][0]
+    variants = [
+        # A blank cell must stay blank, not borrow the split cell's "2:05" or "500m"
+        (sample_90, [('<p>17&zwnj;:53</p>', '<p>--</p>')],
+         {'row': {'total_time_seconds': None, 'total_distance_meters': 4189, 'present': True}},
+         'Blank row time cell'),
+        (sample_90, [('<p>4,189 m</p>', '<p></p>')],
+         {'row': {'total_time_seconds': 1073, 'total_distance_meters': None, 'present': True}},
+         'Blank row distance cell'),
+        # A number in front of a label outside the stat tables isn't a stat value
+        (sample_90, [('<body>', '<body><div style="display:none">99 SPLAT POINTS</div>')],
+         {'total_calories': 1090, 'splat_points': None}, 'Hidden splat label before the stats'),
+        (sample_90, [('<body>', '<body><p>12 CALORIES BURNED</p>')],
+         {'total_calories': None, 'splat_points': 17}, 'Calories label in a preheader'),
+        # Distance without an integer part, and an H:MM:SS time (falls back;
+        # both paths read the leading "1:04", like the original parser)
+        (sample_90, [('<p>3.21</p>', '<p>.5</p>')],
+         {'tread': {'total_time_seconds': 1436, 'distance_meters': 804, 'present': True}},
+         'Tread distance below one mile'),
+        (sample_90, [('<p>23&zwnj;:56</p>', '<p>1:04:52</p>')],
+         {'tread': {'total_time_seconds': 64, 'distance_meters': 5165, 'present': True}},
+         'Tread time with hours'),
+        # Markup around the calories value defeats the raw-HTML scan: the
+        # first email goes through the DOM walk and teaches the template,
+        # the second (same template, other values) is read by XPath replay
+        (sample_90, [('<p class="h1">1090</p>', '<p class="h1"><span>1090</span></p>')],
+         {'total_calories': 1090, 'splat_points': 17, 'class_type': 'ORANGE_90'},
+         'DOM fallback'),
+        (sample_90, [('<p class="h1">1090</p>', '<p class="h1"><span>777</span></p>'),
+                     ('<p class="h1">17</p>', '<p class="h1">21</p>'),
+                     ('<p>4,189 m</p>', '<p>3,000 m</p>')],
+         {'total_calories': 777, 'splat_points': 21,
+          'row': {'total_time_seconds': 1073, 'total_distance_meters': 3000, 'present': True}},
+         'Template replay'),
+        # A learned template must not change what a preheader label yields
+        (sample_90, [('<p class="h1">1090</p>', '<p class="h1"><span>1090</span></p>'),
+                     ('<body>', '<body><p>Your calories burned: 42</p>')],
+         {'total_calories': None, 'splat_points': 17}, 'Template with a preheader label'),
+        # Lone surrogates (undecodable bytes via surrogateescape) on a fallback path
+        (sample_90, [('<p class="h1">1090</p>', '<p class="h1"><span>1090</span></p>'),
+                     ('</body>', '<p>caf\udce9</p></body>')],
+         {'total_calories': 1090, 'class_type': 'ORANGE_90'}, 'Lone surrogate', False),
+    ]
+    results += [test_variant(*variant) for variant in variants]
     
-    # Test 3: Tread 50
-    results.append(
-        test_email(
-            os.path.join(emails_dir, 'sample_tread50.html'),
-            'TREAD_50',
-            'Tread 50 class'
-        )
-    )
+    # Test: Empty files, and repeated parses served from the result cache
+    results.append(test_empty_file())
+    results.append(test_cache_copy(sample_90))
+    
+    # Test 4: Batch parsing across worker processes
+    results.append(test_batch(cases))
+    
+    # Test 5: Columnar output (needs numpy)
+    columns_result = test_columns(cases)
+    if columns_result is not None:
+        results.append(columns_result)
     
     # Summary
     print("\n" + "="*60)